@@ -36,6 +36,7 @@ import string
 import sys
 import sysconfig
 import tokenize
+import types
 from collections.abc import Iterable
 from collections.abc import Mapping
 from collections.abc import MutableMapping
@@ -59,7 +60,19 @@ _LOGGER.propagate = False
 ATOMS = frozenset([tokenize.NAME, tokenize.NUMBER, tokenize.STRING])
 
 EXCEPT_REGEX = re.compile(r"^\s*except [\s,()\w]+ as \w+:$")
+EXCEPT_AS_REGEX = re.compile(r" as \w+:$")
 PYTHON_SHEBANG_REGEX = re.compile(r"^#!.*\bpython[3]?\b\s*$")
+# Lines made only of names, dots and commas, which always tokenize.
+SIMPLE_LINE_REGEX = re.compile(r"[A-Za-z_ \t.,]*\r?\n?\Z")
+
+IMPORT_KEYWORD_REGEX = re.compile(r"\bimport\b")
+FROM_MODULE_REGEX = re.compile(r"\bfrom\s+([^ ]+)")
+COMMA_REGEX = re.compile(r"\s*,\s*")
+QUOTED_NAME_REGEX = re.compile(r"\'(.+?)\'")
+ALL_REGEX = re.compile(r"\b__all__\b")
+DEL_REGEX = re.compile(r"\bdel\b")
+DICT_ENTRY_REGEX = re.compile(r"\s*(.*)\s*:\s*(.*),\s*$")
+NAME_REGEX = re.compile(r"^\w+\s*$")
 
 MAX_PYTHON_FILE_DETECTION_BYTES = 1024
 
@@ -135,10 +148,9 @@ def unused_import_module_name(
     messages: Iterable[pyflakes.messages.Message],
 ) -> Iterable[tuple[int, str]]:
     """Yield line number and module name of unused imports."""
-    pattern = re.compile(r"\'(.+?)\'")
     for message in messages:
         if isinstance(message, pyflakes.messages.UnusedImport):
-            module_name = pattern.search(str(message))
+            module_name = QUOTED_NAME_REGEX.search(str(message))
             if module_name:
                 module_name = module_name.group()[1:-1]
                 yield (message.lineno, module_name)
@@ -232,10 +244,15 @@ def check(source: str) -> Iterable[pyflakes.messages.Message]:
 class StubFile:
     """Stub out file for pyflakes."""
 
+    __slots__ = ()
+
     def write(self, *_: Any) -> None:
         """Stub out."""
 
 
+STUB_FILE = StubFile()
+
+
 class ListReporter(pyflakes.reporter.Reporter):
     """Accumulate messages in messages list."""
 
@@ -244,8 +261,7 @@ class ListReporter(pyflakes.reporter.Reporter):
 
         Ignore errors from Reporter.
         """
-        ignore = StubFile()
-        pyflakes.reporter.Reporter.__init__(self, ignore, ignore)
+        pyflakes.reporter.Reporter.__init__(self, STUB_FILE, STUB_FILE)
         self.messages: list[pyflakes.messages.Message] = []
 
     def flake(self, message: pyflakes.messages.Message) -> None:
@@ -287,6 +303,9 @@ def multiline_statement(line: str, previous_line: str = "") -> bool:
         if symbol in line:
             return True
 
+    if SIMPLE_LINE_REGEX.match(line):
+        return previous_line.rstrip().endswith("\\")
+
     sio = io.StringIO(line)
     try:
         list(tokenize.generate_tokens(sio.readline))
@@ -315,6 +334,19 @@ class PendingFix:
         """
         raise NotImplementedError("Abstract method needs to be overwritten")
 
+    def feed(self, lines: Iterable[str]) -> PendingFix | str:
+        """Process the following lines until the rewrite is finished.
+
+        Return the final string as soon as it is produced (remaining lines
+        are not consumed) or the pending fix if the lines run out first.
+        """
+        result: PendingFix | str = self
+        for line in lines:
+            result = result(line)
+            if not isinstance(result, PendingFix):
+                break
+        return result
+
 
 def _valid_char_in_line(char: str, line: str) -> bool:
     """Return True if a char appears in the line and is not commented."""
@@ -493,19 +525,12 @@ def filter_from_import(line: str, unused_module: Iterable[str]) -> str:
     Return line without unused import modules, or `pass` if all of the
     module in import is unused.
     """
-    (indentation, imports) = re.split(
-        pattern=r"\bimport\b",
-        string=line,
-        maxsplit=1,
-    )
-    match = re.search(
-        pattern=r"\bfrom\s+([^ ]+)",
-        string=indentation,
-    )
+    (indentation, imports) = IMPORT_KEYWORD_REGEX.split(line, maxsplit=1)
+    match = FROM_MODULE_REGEX.search(indentation)
     assert match is not None
     base_module = match.group(1)
 
-    imports = re.split(pattern=r"\s*,\s*", string=imports.strip())
+    imports = COMMA_REGEX.split(imports.strip())
     filtered_imports = _filter_imports(imports, base_module, unused_module)
 
     # All of the import in this statement is unused
@@ -530,11 +555,7 @@ def break_up_import(line: str) -> str:
     if not newline:
         return line
 
-    (indentation, imports) = re.split(
-        pattern=r"\bimport\b",
-        string=line,
-        maxsplit=1,
-    )
+    (indentation, imports) = IMPORT_KEYWORD_REGEX.split(line, maxsplit=1)
 
     indentation += "import "
     assert newline
@@ -560,7 +581,22 @@ def filter_code(
         imports |= frozenset(additional_imports)
     del additional_imports
 
+    if (
+        "import" not in source
+        and not remove_unused_variables
+        and not remove_duplicate_keys
+    ):
+        # Only import statements can cause the remaining fixes, so there is no
+        # need to run pyflakes.
+        yield from io.StringIO(source)
+        return
+
     messages = check(source)
+    if not messages:
+        # Nothing to fix. This includes sources pyflakes could not parse, which
+        # are reported as syntax errors rather than messages.
+        yield from io.StringIO(source)
+        return
 
     if ignore_init_module_imports:
         marked_import_line_numbers: frozenset[int] = frozenset()
@@ -575,8 +611,8 @@ def filter_code(
     undefined_names: list[str] = []
     if expand_star_imports and not (
         # See explanations in #18.
-        re.search(r"\b__all__\b", source)
-        or re.search(r"\bdel\b", source)
+        ALL_REGEX.search(source)
+        or DEL_REGEX.search(source)
     ):
         marked_star_import_line_numbers = frozenset(
             star_import_used_line_numbers(messages),
@@ -666,7 +702,7 @@ def filter_star_import(
 ) -> str:
     """Return line with the star import expanded."""
     undefined_name = sorted(set(marked_star_import_undefined_name))
-    return re.sub(r"\*", ", ".join(undefined_name), line)
+    return line.replace("*", ", ".join(undefined_name))
 
 
 def filter_unused_import(
@@ -717,8 +753,8 @@ def filter_unused_variable(
     drop_rhs: bool = False,
 ) -> str:
     """Return line if used, otherwise return None."""
-    if re.match(EXCEPT_REGEX, line):
-        return re.sub(r" as \w+:$", ":", line, count=1)
+    if EXCEPT_REGEX.match(line):
+        return EXCEPT_AS_REGEX.sub(":", line, count=1)
     elif multiline_statement(line, previous_line):
         return line
     elif line.count("=") == 1:
@@ -767,7 +803,7 @@ def dict_entry_has_key(line: str, key: Any) -> bool:
     if "#" in line:
         return False
 
-    result = re.match(r"\s*(.*)\s*:\s*(.*),\s*$", line)
+    result = DICT_ENTRY_REGEX.match(line)
     if not result:
         return False
 
@@ -795,7 +831,7 @@ def is_literal_or_name(value: str) -> bool:
 
     # Support removal of variables on the right side. But make sure
     # there are no dots, which could mean an access of a property.
-    return re.match(r"^\w+\s*$", value) is not None
+    return NAME_REGEX.match(value) is not None
 
 
 def useless_pass_line_numbers(
@@ -857,7 +893,7 @@ def filter_useless_pass(
     ignore_pass_after_docstring: bool = False,
 ) -> Iterable[str]:
     """Yield code with useless "pass" lines removed."""
-    if ignore_pass_statements:
+    if ignore_pass_statements or "pass" not in source:
         marked_lines: frozenset[int] = frozenset()
     else:
         try:
@@ -1195,59 +1231,106 @@ def find_files(
 
 def process_pyproject_toml(toml_file_path: str) -> MutableMapping[str, Any] | None:
     """Extract config mapping from pyproject.toml file."""
+    try:
+        source = pathlib.Path(toml_file_path).read_bytes()
+    except OSError:
+        return None
+
+    return _parse_pyproject_toml(source, toml_file_path)
+
+
+def _parse_pyproject_toml(
+    source: bytes,
+    toml_file_path: str,
+) -> MutableMapping[str, Any] | None:
+    """Extract config mapping from pyproject.toml contents."""
     try:
         import tomllib
     except ModuleNotFoundError:
         import tomli as tomllib
 
-    with open(toml_file_path, "rb") as f:
-        return tomllib.load(f).get("tool", {}).get("autoflake", None)
+    return tomllib.loads(source.decode()).get("tool", {}).get("autoflake", None)
 
 
 def process_config_file(config_file_path: str) -> MutableMapping[str, Any] | None:
     """Extract config mapping from config file."""
+    try:
+        source = pathlib.Path(config_file_path).read_bytes()
+    except OSError:
+        return None
+
+    return _parse_config_file(source, config_file_path)
+
+
+def _parse_config_file(
+    source: bytes,
+    config_file_path: str,
+) -> MutableMapping[str, Any] | None:
+    """Extract config mapping from config file contents."""
     import configparser
 
     reader = configparser.ConfigParser()
-    reader.read(config_file_path, encoding="utf-8")
+    # Decode with universal newlines, as reading the file as text would.
+    config_source = io.TextIOWrapper(io.BytesIO(source), encoding="utf-8").read()
+    reader.read_string(config_source, source=config_file_path)
     if not reader.has_section("autoflake"):
         return None
 
     return reader["autoflake"]
 
 
-def find_and_process_config(args: Mapping[str, Any]) -> MutableMapping[str, Any] | None:
-    # Configuration file parsers {filename: parser function}.
-    CONFIG_FILES: Mapping[str, Callable[[str], MutableMapping[str, Any] | None]] = {
-        "pyproject.toml": process_pyproject_toml,
-        "setup.cfg": process_config_file,
-    }
+def _load_config(
+    config_file_path: str,
+    parser: Callable[[bytes, str], Mapping[str, Any] | None],
+) -> Mapping[str, Any] | None:
+    """Return config mapping from a config file."""
+    try:
+        source = pathlib.Path(config_file_path).read_bytes()
+    except OSError:
+        return None
+
+    return parser(source, config_file_path)
+
+
+# Configuration file parsers {filename: parser function}.
+CONFIG_FILES: Mapping[
+    str,
+    Callable[[bytes, str], MutableMapping[str, Any] | None],
+] = types.MappingProxyType(
+    {
+        "pyproject.toml": _parse_pyproject_toml,
+        "setup.cfg": _parse_config_file,
+    },
+)
+
+
+def _process_config_in_directory(directory: str) -> Mapping[str, Any] | None:
+    """Return config mapping from the first config file found in directory."""
+    for config_file, parser in CONFIG_FILES.items():
+        config_file_path = os.path.join(directory, config_file)
+        if os.path.isfile(config_file_path):
+            config = _load_config(config_file_path, parser)
+            if config is not None:
+                return config
+    return None
+
+
+def find_and_process_config(args: Mapping[str, Any]) -> Mapping[str, Any] | None:
     # Traverse the file tree common to all files given as argument looking for
     # a configuration file
     config_path = os.path.commonpath([os.path.abspath(file) for file in args["files"]])
-    config: Mapping[str, Any] | None = None
     while True:
-        for config_file, processor in CONFIG_FILES.items():
-            config_file_path = os.path.join(
-                os.path.join(config_path, config_file),
-            )
-            if os.path.isfile(config_file_path):
-                config = processor(config_file_path)
-                if config is not None:
-                    break
+        config = _process_config_in_directory(config_path)
         if config is not None:
-            break
+            return config
         config_path, tail = os.path.split(config_path)
         if not tail:
-            break
-    return config
+            return None
 
 
-def merge_configuration_file(
-    flag_args: MutableMapping[str, Any],
-) -> tuple[MutableMapping[str, Any], bool]:
-    """Merge configuration from a file into args."""
-    BOOL_TYPES = {
+# Accepted spellings of booleans in config files.
+BOOL_TYPES: Mapping[str, bool] = types.MappingProxyType(
+    {
         "1": True,
         "yes": True,
         "true": True,
@@ -1256,26 +1339,11 @@ def merge_configuration_file(
         "no": False,
         "false": False,
         "off": False,
-    }
-
-    if "config_file" in flag_args:
-        config_file = pathlib.Path(flag_args["config_file"]).resolve()
-        process_method = process_config_file
-        if config_file.suffix == ".toml":
-            process_method = process_pyproject_toml
-
-        config = process_method(str(config_file))
-
-        if not config:
-            _LOGGER.error(
-                "can't parse config file '%s'",
-                config_file,
-            )
-            return flag_args, False
-    else:
-        config = find_and_process_config(flag_args)
+    },
+)
 
-    BOOL_FLAGS = {
+BOOL_FLAGS = frozenset(
+    [
         "check",
         "check_diff",
         "expand_star_imports",
@@ -1290,42 +1358,80 @@ def merge_configuration_file(
         "remove_rhs_for_unused_variables",
         "remove_unused_variables",
         "write_to_stdout",
-    }
+    ],
+)
+
+DEFAULT_ARGS: Mapping[str, Any] = types.MappingProxyType(
+    dict.fromkeys(BOOL_FLAGS, False),
+)
+
+# Comma separated values that are joined when given in both the config file
+# and on the command line.
+MERGEABLE_ARGS = ("imports", "exclude")
+
+
+def _coerce_bool(value: Any) -> bool:
+    """Return config file value as a boolean."""
+    if isinstance(value, str):
+        value = BOOL_TYPES.get(value.lower(), value)
+    if not isinstance(value, bool):
+        raise ValueError("should be a boolean")
+    return value
+
+
+def _coerce_comma_separated(value: Any) -> str:
+    """Return config file value as a comma separated string."""
+    if isinstance(value, list) and all(isinstance(val, str) for val in value):
+        value = ",".join(value)
+    if not isinstance(value, str):
+        raise ValueError("should be a comma separated string or list of strings")
+    return value
+
+
+# Config file value coercers by argument name. Arguments not listed here
+# take a comma separated string.
+CONFIG_COERCERS: Mapping[str, Callable[[Any], Any]] = types.MappingProxyType(
+    dict.fromkeys(BOOL_FLAGS, _coerce_bool),
+)
+
+
+def merge_configuration_file(
+    flag_args: MutableMapping[str, Any],
+) -> tuple[MutableMapping[str, Any], bool]:
+    """Merge configuration from a file into args."""
+    if "config_file" in flag_args:
+        config_file = pathlib.Path(flag_args["config_file"]).resolve()
+        parser = _parse_config_file
+        if config_file.suffix == ".toml":
+            parser = _parse_pyproject_toml
+
+        config = _load_config(str(config_file), parser)
+
+        if not config:
+            _LOGGER.error(
+                "can't parse config file '%s'",
+                config_file,
+            )
+            return flag_args, False
+    elif os.environ.get("AUTOFLAKE_NO_CONFIG"):
+        config = None
+    else:
+        config = find_and_process_config(flag_args)
 
     config_args: dict[str, Any] = {}
     if config is not None:
         for name, value in config.items():
             arg = name.replace("-", "_")
-            if arg in BOOL_FLAGS:
-                # boolean properties
-                if isinstance(value, str):
-                    value = BOOL_TYPES.get(value.lower(), value)
-                if not isinstance(value, bool):
-                    _LOGGER.error(
-                        "'%s' in the config file should be a boolean",
-                        name,
-                    )
-                    return flag_args, False
-                config_args[arg] = value
-            else:
-                if isinstance(value, list) and all(
-                    isinstance(val, str) for val in value
-                ):
-                    value = ",".join(str(val) for val in value)
-                if not isinstance(value, str):
-                    _LOGGER.error(
-                        "'%s' in the config file should be a comma separated"
-                        " string or list of strings",
-                        name,
-                    )
-                    return flag_args, False
-
-                config_args[arg] = value
+            coerce = CONFIG_COERCERS.get(arg, _coerce_comma_separated)
+            try:
+                config_args[arg] = coerce(value)
+            except ValueError as exception:
+                _LOGGER.error("'%s' in the config file %s", name, exception)
+                return flag_args, False
 
     # merge args that can be merged
     merged_args = {}
-    mergeable_keys = {"imports", "exclude"}
-    for key in mergeable_keys:
+    for key in MERGEABLE_ARGS:
         values = (
             v for v in (config_args.get(key), flag_args.get(key)) if v is not None
         )
@@ -1333,9 +1439,8 @@ def merge_configuration_file(
         if value != "":
             merged_args[key] = value
 
-    default_args = {arg: False for arg in BOOL_FLAGS}
     return {
-        **default_args,
+        **DEFAULT_ARGS,
         **config_args,
         **flag_args,
         **merged_args,
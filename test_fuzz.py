@@ -8,20 +8,23 @@ Pyflakes warnings is also confirmed to always improve.
 from __future__ import annotations
 
 import argparse
+import functools
+import io
+import itertools
 import os
 import shlex
 import subprocess
 import sys
+import traceback
+from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
 
 import autoflake
 
 
-ROOT_PATH = os.path.abspath(os.path.dirname(__file__))
-AUTOFLAKE_BIN = "'{}' '{}'".format(
-    sys.executable,
-    os.path.join(ROOT_PATH, "autoflake.py"),
-)
+# Files passed to each autoflake run, to amortize its startup cost.
+BATCH_SIZE = 64
 
 if sys.stdout.isatty():
     YELLOW = "\x1b[33m"
@@ -36,116 +39,220 @@ def colored(text: str, color: str) -> str:
     return color + text + END
 
 
-def pyflakes_count(filename: str) -> int:
+def read_source(filename: str) -> str:
+    """Return decoded contents of file, reading it only once."""
+    with open(filename, "rb") as input_file:
+        return decode(input_file.read())
+
+
+def decode(data: bytes) -> str:
+    """Return source code decoded from data."""
+    # Same decoding as autoflake.detect_encoding() and open_with_encoding(),
+    # without reading the file again for each step.
+    encoding = autoflake._detect_encoding(io.BytesIO(data).readline)
+    try:
+        return data.decode(encoding)
+    except (LookupError, UnicodeDecodeError):
+        return data.decode("latin-1")
+
+
+# Sources are cached because a fixed file that autoflake left unchanged, or
+# a file vendored in several places, would otherwise be analyzed again.
+@functools.lru_cache(maxsize=1024)
+def pyflakes_count(source: str) -> int:
     """Return pyflakes error count."""
-    with autoflake.open_with_encoding(
-        filename,
-        encoding=autoflake.detect_encoding(filename),
-    ) as f:
-        return len(list(autoflake.check(f.read())))
+    return len(list(autoflake.check(source)))
 
 
-def readlines(filename: str) -> Sequence[str]:
-    """Return contents of file as a list of lines."""
-    with autoflake.open_with_encoding(
-        filename,
-        encoding=autoflake.detect_encoding(filename),
-    ) as f:
-        return f.readlines()
+def can_change(source: str) -> bool:
+    """Return True if autoflake might change source."""
+    # Apart from fixing pyflakes warnings, autoflake only removes useless
+    # "pass" statements.
+    return pyflakes_count(source) > 0 or "pass" in source or not check_syntax(source)
 
 
-def diff(before: str, after: str) -> str:
-    """Return diff of two files."""
+def diff(before: str, after: str, before_name: str, after_name: str) -> str:
+    """Return diff of two sources."""
     import difflib
 
     return "".join(
         difflib.unified_diff(
-            readlines(before),
-            readlines(after),
-            before,
-            after,
+            io.StringIO(before, newline="").readlines(),
+            io.StringIO(after, newline="").readlines(),
+            before_name,
+            after_name,
         ),
     )
 
 
 def run(
-    filename: str,
-    command: str,
+    filenames: Sequence[str],
+    command: Sequence[str] | None = None,
     verbose: bool = False,
     options: list[str] | None = None,
 ) -> bool:
-    """Run autoflake on file at filename.
+    """Run autoflake once on the files at filenames.
 
-    Return True on success.
+    autoflake runs in-process unless a command is given. Return True on
+    success.
     """
     if not options:
         options = []
 
-    import test_autoflake
-
-    with test_autoflake.temporary_directory() as temp_directory:
-        temp_filename = os.path.join(
-            temp_directory,
-            os.path.basename(filename),
-        )
-        import shutil
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        basenames: set[str] = set()
+        checked_filenames = []
+        sources = []
+        temp_filenames = []
+        for index, filename in enumerate(filenames):
+            with open(filename, "rb") as input_file:
+                data = input_file.read()
+            source = decode(data)
+            if not can_change(source):
+                continue
 
-        shutil.copyfile(filename, temp_filename)
+            # Keep the basename, which autoflake looks at for __init__.py. Only
+            # files whose basename is already taken get a subdirectory.
+            basename = os.path.basename(filename)
+            if basename in basenames:
+                directory = os.path.join(temp_directory, str(index))
+                os.mkdir(directory)
+            else:
+                basenames.add(basename)
+                directory = temp_directory
+            temp_filename = os.path.join(directory, basename)
+            with open(temp_filename, "wb") as output_file:
+                output_file.write(data)
+            checked_filenames.append(filename)
+            sources.append(source)
+            temp_filenames.append(temp_filename)
+
+        if not temp_filenames:
+            return True
 
-        if 0 != subprocess.call(
-            shlex.split(command) + ["--in-place", temp_filename] + options,
-        ):
-            sys.stderr.write("autoflake crashed on " + filename + "\n")
+        if run_autoflake(temp_filenames, command=command, options=options) != 0:
+            # Rerun the files one at a time on fresh copies to name the ones
+            # autoflake fails on.
+            import shutil
+
+            crashed_filenames = []
+            for filename, temp_filename in zip(checked_filenames, temp_filenames):
+                shutil.copyfile(filename, temp_filename)
+                if run_autoflake([temp_filename], command=command, options=options):
+                    crashed_filenames.append(filename)
+
+            sys.stderr.write(
+                "autoflake crashed on "
+                + ", ".join(crashed_filenames or checked_filenames)
+                + "\n",
+            )
             return False
 
-        try:
-            file_diff = diff(filename, temp_filename)
-            if verbose:
-                sys.stderr.write(file_diff)
-
-            if check_syntax(filename):
-                try:
-                    check_syntax(temp_filename, raise_error=True)
-                except (
-                    SyntaxError,
-                    TypeError,
-                    UnicodeDecodeError,
-                    ValueError,
-                ) as exception:
-                    sys.stderr.write(
-                        "autoflake broke " + filename + "\n" + str(exception) + "\n",
-                    )
+        for filename, source, temp_filename in zip(
+            checked_filenames,
+            sources,
+            temp_filenames,
+        ):
+            try:
+                if not check_fix(filename, source, temp_filename, verbose=verbose):
                     return False
+            except (UnicodeDecodeError, UnicodeEncodeError) as exception:
+                # Ignore annoying codec problems on Python 2.
+                print(exception, file=sys.stderr)
+
+    return True
+
 
-            before_count = pyflakes_count(filename)
-            after_count = pyflakes_count(temp_filename)
+def run_autoflake(
+    filenames: Sequence[str],
+    command: Sequence[str] | None = None,
+    options: Sequence[str] = (),
+) -> int:
+    """Run autoflake in place on filenames and return its exit status.
+
+    autoflake runs in-process unless a command is given.
+    """
+    arguments = ["--in-place", "--jobs=1", *filenames, *options]
+    if command:
+        return subprocess.call([*command, *arguments])
+
+    handlers = set(autoflake._LOGGER.handlers)
+    try:
+        return autoflake._main(
+            ["autoflake", *arguments],
+            standard_out=None,
+            standard_error=sys.stderr,
+        )
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        # _main() adds a log handler on every call.
+        for handler in set(autoflake._LOGGER.handlers) - handlers:
+            autoflake._LOGGER.removeHandler(handler)
 
-            if verbose:
-                print("(before, after):", (before_count, after_count))
 
-            if file_diff and after_count > before_count:
-                sys.stderr.write("autoflake made " + filename + " worse\n")
+def check_fix(
+    filename: str,
+    source: str,
+    temp_filename: str,
+    verbose: bool = False,
+) -> bool:
+    """Compare source of file at filename with its fixed copy at temp_filename.
+
+    Return True on success.
+    """
+    try:
+        fixed_source = read_source(temp_filename)
+
+        if verbose:
+            sys.stderr.write(diff(source, fixed_source, filename, temp_filename))
+
+        if check_syntax(source):
+            try:
+                check_syntax(fixed_source, raise_error=True)
+            except (SyntaxError, TypeError, ValueError) as exception:
+                sys.stderr.write(
+                    "autoflake broke " + filename + "\n" + str(exception) + "\n",
+                )
                 return False
-        except OSError as exception:
-            sys.stderr.write(str(exception) + "\n")
+
+        before_count = pyflakes_count(source)
+        after_count = pyflakes_count(fixed_source)
+
+        if verbose:
+            print("(before, after):", (before_count, after_count))
+
+        if fixed_source != source and after_count > before_count:
+            sys.stderr.write("autoflake made " + filename + " worse\n")
+            return False
+    except OSError as exception:
+        sys.stderr.write(str(exception) + "\n")
 
     return True
 
 
-def check_syntax(filename: str, raise_error: bool = False) -> bool:
+def check_syntax(source: str, raise_error: bool = False) -> bool:
     """Return True if syntax is okay."""
-    with autoflake.open_with_encoding(
-        filename,
-        encoding=autoflake.detect_encoding(filename),
-    ) as input_file:
-        try:
-            compile(input_file.read(), "<string>", "exec", dont_inherit=True)
-            return True
-        except (SyntaxError, TypeError, UnicodeDecodeError, ValueError):
-            if raise_error:
-                raise
-            else:
-                return False
+    error = _syntax_error(source)
+    if error is None:
+        return True
+    elif raise_error:
+        raise error
+    else:
+        return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _syntax_error(source: str) -> Exception | None:
+    """Return error raised by compiling source, if any."""
+    try:
+        compile(source, "<string>", "exec", dont_inherit=True)
+    except (SyntaxError, TypeError, ValueError) as exception:
+        return exception
+    return None
 
 
 def process_args() -> argparse.Namespace:
@@ -154,8 +261,7 @@ def process_args() -> argparse.Namespace:
 
     parser.add_argument(
         "--command",
-        default=AUTOFLAKE_BIN,
-        help="autoflake command (default: %(default)s)",
+        help="autoflake command (default: run autoflake in-process)",
     )
 
     parser.add_argument(
@@ -194,11 +300,97 @@ def process_args() -> argparse.Namespace:
         help="print verbose messages",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        metavar="n",
+        default=0,
+        help="number of parallel jobs; match CPU count if value is 0 (default: 0)",
+    )
+
     parser.add_argument("files", nargs="*", help="files to test against")
 
     return parser.parse_args()
 
 
+def walk_python_files(directory: str) -> Iterator[str]:
+    """Yield Python files under directory, skipping hidden entries."""
+    # DirEntry caches the file type from the directory listing, so only
+    # symlinks need an extra stat.
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        # Like os.walk(), skip directories that cannot be listed.
+        return
+
+    with entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_python_files(entry.path)
+            elif entry.name.endswith(".py") and entry.is_file():
+                if entry.is_symlink():
+                    yield os.path.realpath(entry.path)
+                else:
+                    yield entry.path
+
+
+def find_files(dir_paths: Iterable[str]) -> Iterator[str]:
+    """Yield Python files found recursively in the given paths."""
+    completed_filenames: set[str] = set()
+
+    for path in dir_paths:
+        # Only the given paths need resolving. The walk does not follow
+        # directory symlinks, so paths below a resolved directory are canonical.
+        name = os.path.realpath(path)
+        if os.path.isdir(name):
+            candidates: Iterable[str] = walk_python_files(name)
+        elif os.path.exists(name):
+            candidates = [name]
+        else:
+            # Invalid symlink.
+            continue
+
+        for filename in candidates:
+            if filename in completed_filenames:
+                sys.stderr.write(
+                    colored(
+                        "--->  Skipping previously tested " + filename + "\n",
+                        YELLOW,
+                    ),
+                )
+                continue
+
+            completed_filenames.add(filename)
+            yield filename
+
+
+def batched(iterable: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def check_files(
+    names: Sequence[str],
+    command: Sequence[str] | None = None,
+    verbose: bool = False,
+    options: list[str] | None = None,
+) -> bool:
+    """Run autoflake on batch of files and report progress.
+
+    Return False if the fix results in broken syntax.
+    """
+    for name in names:
+        verbose_message = "--->  Testing with " + name
+        sys.stderr.write(colored(verbose_message + "\n", YELLOW))
+
+    return run(names, command=command, verbose=verbose, options=options)
+
+
 def check(args: argparse.Namespace) -> bool:
     """Run recursively run autoflake on directory of files.
 
@@ -225,53 +417,26 @@ def check(args: argparse.Namespace) -> bool:
     if args.remove_unused_variables:
         options.append("--remove-unused-variables")
 
-    filenames = dir_paths
-    completed_filenames = set()
-
-    while filenames:
-        try:
-            name = os.path.realpath(filenames.pop(0))
-            if not os.path.exists(name):
-                # Invalid symlink.
-                continue
+    jobs = args.jobs
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
 
-            if name in completed_filenames:
-                sys.stderr.write(
-                    colored(
-                        "--->  Skipping previously tested " + name + "\n",
-                        YELLOW,
-                    ),
-                )
-                continue
-            else:
-                completed_filenames.update(name)
+    check_batch = functools.partial(
+        check_files,
+        command=shlex.split(args.command) if args.command else None,
+        verbose=args.verbose,
+        options=options,
+    )
+    batches = batched(find_files(dir_paths), BATCH_SIZE)
 
-            if os.path.isdir(name):
-                for root, directories, children in os.walk(name):
-                    filenames += [
-                        os.path.join(root, f)
-                        for f in children
-                        if f.endswith(".py") and not f.startswith(".")
-                    ]
+    if jobs == 1:
+        return all(map(check_batch, batches))
 
-                    directories[:] = [d for d in directories if not d.startswith(".")]
-            else:
-                verbose_message = "--->  Testing with " + name
-                sys.stderr.write(colored(verbose_message + "\n", YELLOW))
-
-                if not run(
-                    os.path.join(name),
-                    command=args.command,
-                    verbose=args.verbose,
-                    options=options,
-                ):
-                    return False
-        except (UnicodeDecodeError, UnicodeEncodeError) as exception:
-            # Ignore annoying codec problems on Python 2.
-            print(exception, file=sys.stderr)
-            continue
+    import multiprocessing
 
-    return True
+    with multiprocessing.Pool(jobs) as pool:
+        # Leaving the block early terminates the remaining workers.
+        return all(pool.imap(check_batch, batches))
 
 
 def main() -> int: